@@ -12,12 +12,15 @@ develop a new k8s charm using the Operator Framework:
     https://discourse.charmhub.io/t/4208
 """
 
+import hashlib
 import logging
+import re
 import requests
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 
 from charms.nginx_ingress_integrator.v0.ingress import IngressRequires
-from jinja2 import Template
 from ops.charm import CharmBase
 from ops.framework import StoredState
 from ops.main import main
@@ -47,6 +50,10 @@ ALL_ROLES = [
     "webconsole",
 ]
 
+ALL_ROLES_SET = frozenset(ALL_ROLES)
+
+ROLES_RE = re.compile(r"[A-Za-z0-9]+(?:,[A-Za-z0-9]+)*")
+
 ADMIN_USERNAME = "admin"
 ADMIN_GROUP_NAME = "admingroup"
 
@@ -58,13 +65,42 @@ DEFAULT_GROUPS = {
     GUEST_GROUP_NAME: ["group", "viewer"],
 }
 
-USERS_TEMPLATE = """
-{% for user, userdata in users.items() %}{{user}} = {{userdata.password}},_g_:{{userdata.group}}
-{% endfor %}
 
-{% for group, roles in groups.items() %}_g_\:{{group}} = {{",".join(roles)}}
-{% endfor %}
-"""
+def _render_users_properties(users: dict, groups: dict) -> str:
+    lines = [
+        f"{user} = {userdata['password']},_g_:{userdata['group']}"
+        for user, userdata in users.items()
+    ]
+    lines.append("")
+    lines.extend(
+        f"_g_\\:{group} = {','.join(roles)}" for group, roles in groups.items()
+    )
+    return "\n".join(lines) + "\n"
+
+
+BASE_ONOS_ENV = {
+    "PATH": "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin",
+    "LANG": "en_US.UTF-8",
+    "LANGUAGE": "en_US:en",
+    "LC_ALL": "en_US.UTF-8",
+    "JAVA_HOME": "/usr/lib/jvm/zulu11-ca-amd64",
+}
+
+
+ACTION_NAMES = (
+    "restart",
+    "start",
+    "stop",
+    "list_activated_apps",
+    "list_available_apps",
+    "activate_app",
+    "deactivate_app",
+    "list_roles",
+    "add_user",
+    "add_group",
+    "delete_user",
+    "delete_group",
+)
 
 
 ASYNC_LOGGING = """
@@ -86,28 +122,32 @@ class OnosCharm(CharmBase):
     def __init__(self, *args):
         super().__init__(*args)
 
+        # Reusable HTTP session towards the ONOS REST API (keep-alive)
+        self._http = requests.Session()
+
+        # Cached handle to the onos container
+        self._onos_container = None
+
+        # Cached apache-karaf folder name (immutable after install)
+        self._karaf_folder = None
+
+        # Cached list of applications available on the container disk
+        self._available_apps_cache = None
+
+        # Cached comma-joined view of the activated apps
+        self._apps_joined_cache = None
+        self._apps_joined_len = -1
+
         # Observe lifecycle events
         self.framework.observe(self.on.onos_pebble_ready, self._on_onos_pebble_ready)
         self.framework.observe(self.on.config_changed, self._on_config_changed)
 
         # Observe action events
-        action_event_observer_mapping = {
-            "restart": self._on_restart_action,
-            "start": self._on_start_action,
-            "stop": self._on_stop_action,
-            "list_activated_apps": self._on_list_activated_apps_action,
-            "list_available_apps": self._on_list_available_apps_action,
-            "activate_app": self._on_activate_app_action,
-            "deactivate_app": self._on_deactivate_app_action,
-            "list_roles": self._on_list_roles_action,
-            "add_user": self._on_add_user_action,
-            "add_group": self._on_add_group_action,
-            "delete_user": self._on_delete_user_action,
-            "delete_group": self._on_delete_group_action,
-        }
-        for event, observer in action_event_observer_mapping.items():
-            logger.debug(f"event: {event}")
-            self.framework.observe(self.on[event].action, observer)
+        for event in ACTION_NAMES:
+            logger.debug("event: %s", event)
+            self.framework.observe(
+                self.on[event].action, getattr(self, f"_on_{event}_action")
+            )
 
         self._stored.set_default(
             apps=set({SYS_APP}),
@@ -115,6 +155,8 @@ class OnosCharm(CharmBase):
             ready=False,
             users=dict(),
             groups=dict(),
+            async_logging_installed=False,
+            users_props_hash="",
         )
         if "external-hostname" in self.config:
             self._ingress = IngressRequires(
@@ -132,7 +174,9 @@ class OnosCharm(CharmBase):
 
     @property
     def onos_container(self):
-        return self.unit.get_container("onos")
+        if self._onos_container is None:
+            self._onos_container = self.unit.get_container("onos")
+        return self._onos_container
 
     @property
     def onos_service(self):
@@ -140,7 +184,10 @@ class OnosCharm(CharmBase):
 
     @property
     def onos_apps(self) -> str:
-        return ", ".join(self._stored.apps)
+        if len(self._stored.apps) != self._apps_joined_len:
+            self._apps_joined_len = len(self._stored.apps)
+            self._apps_joined_cache = ", ".join(sorted(self._stored.apps))
+        return self._apps_joined_cache
 
     @property
     def pebble_started(self) -> bool:
@@ -176,6 +223,13 @@ class OnosCharm(CharmBase):
     def groups(self) -> dict:
         return self._stored.groups
 
+    @property
+    def http_session(self) -> requests.Session:
+        auth = (ADMIN_USERNAME, self.config["admin-password"])
+        if self._http.auth != auth:
+            self._http.auth = auth
+        return self._http
+
     ##############################
     # LIFECYCLE OBSERVERS
     ##############################
@@ -193,6 +247,10 @@ class OnosCharm(CharmBase):
         """Observer for onos-pebble-ready event"""
         try:
             self._stored.ready = True
+            self._karaf_folder = None
+            self._available_apps_cache = None
+            self._stored.users_props_hash = ""
+            self._stored.async_logging_installed = False
             self._configure()
             self._add_onos_layer()
             self._restart_onos()
@@ -230,10 +288,13 @@ class OnosCharm(CharmBase):
     def _on_activate_app_action(self, event):
         """Observer for activate-app action event"""
         try:
-            app_name = event.params["name"]
-            self._activate_app(app_name)
+            app_names = event.params["name"].split(",")
+            self._activate_apps(app_names)
             event.set_results(
-                {"output": f"application {app_name} successfully activated"}
+                {
+                    "output": f'application(s) {", ".join(app_names)} '
+                    "successfully activated"
+                }
             )
         except Exception as e:
             event.fail(f"Failed activating app: {e}")
@@ -241,10 +302,13 @@ class OnosCharm(CharmBase):
     def _on_deactivate_app_action(self, event):
         """Observer for deactivate-app action event"""
         try:
-            app_name = event.params["name"]
-            self._deactivate_app(app_name)
+            app_names = event.params["name"].split(",")
+            self._deactivate_apps(app_names)
             event.set_results(
-                {"output": f"application {app_name} successfully deactivated"}
+                {
+                    "output": f'application(s) {", ".join(app_names)} '
+                    "successfully deactivated"
+                }
             )
         except Exception as e:
             event.fail(f"Failed deactivating app: {e}")
@@ -336,11 +400,7 @@ class OnosCharm(CharmBase):
                         "command": "./bin/onos-service",
                         "startup": "enabled",
                         "environment": {
-                            "PATH": "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin",
-                            "LANG": "en_US.UTF-8",
-                            "LANGUAGE": "en_US:en",
-                            "LC_ALL": "en_US.UTF-8",
-                            "JAVA_HOME": "/usr/lib/jvm/zulu11-ca-amd64",
+                            **BASE_ONOS_ENV,
                             "JAVA_OPTS": self.config["java-opts"],
                             "ONOS_APPS": self.onos_apps,
                         },
@@ -362,19 +422,32 @@ class OnosCharm(CharmBase):
         self._configure_async_logging()
 
     def _configure_users_and_groups(self):
+        users = {username: dict(userdata) for username, userdata in self.users.items()}
+        if ADMIN_USERNAME not in users:
+            users.update(self.admin_user)
+        if self.config.get("enable-guest") and GUEST_USERNAME not in users:
+            users.update(self.guest_user)
+        self._stored.users = users
+        groups = {group: list(roles) for group, roles in self.groups.items()}
+        if DEFAULT_GROUPS.keys().isdisjoint(groups):
+            groups.update(DEFAULT_GROUPS)
+        self._stored.groups = groups
+        self._flush_users()
+
+    def _flush_users(self):
         apache_karaf_folder = self._get_apache_karaf_folder_path()
-        if ADMIN_USERNAME not in self.users:
-            self.users.update(self.admin_user)
-        if self.config.get("enable-guest") and GUEST_USERNAME not in self.users:
-            self.users.update(self.guest_user)
-        if all(group not in self.groups for group in DEFAULT_GROUPS.keys()):
-            self.groups.update(DEFAULT_GROUPS)
         if self.pebble_ready and apache_karaf_folder:
-            t = Template(USERS_TEMPLATE)
+            rendered = _render_users_properties(self.users, self.groups)
+            rendered_hash = hashlib.blake2b(
+                rendered.encode(), digest_size=8
+            ).hexdigest()
+            if rendered_hash == self._stored.users_props_hash:
+                return
             self.onos_container.push(
                 f"{ROOT_FOLDER}/{apache_karaf_folder}/etc/users.properties",
-                t.render(users=self.users, groups=self.groups),
+                rendered,
             )
+            self._stored.users_props_hash = rendered_hash
 
     def _configure_gui_app(self):
         gui_enabled = GUI_APP in self._stored.apps
@@ -391,27 +464,34 @@ class OnosCharm(CharmBase):
             )
 
     def _configure_async_logging(self):
+        if self._stored.async_logging_installed:
+            return
         apache_karaf_folder = self._get_apache_karaf_folder_path()
         if self.pebble_ready and apache_karaf_folder:
             logging_content = self.onos_container.pull(
                 f"{ROOT_FOLDER}/{apache_karaf_folder}/etc/org.ops4j.pax.logging.cfg"
             ).read()
-            if ASYNC_LOGGING not in logging_content:
+            if not logging_content.rstrip().endswith(ASYNC_LOGGING.strip()):
                 logging_content += ASYNC_LOGGING
                 self.onos_container.push(
                     f"{ROOT_FOLDER}/{apache_karaf_folder}/etc/org.ops4j.pax.logging.cfg",
                     logging_content,
                 )
+            self._stored.async_logging_installed = True
 
     ##############################
     # ONOS OPERATIONS
     ##############################
 
     def _get_available_apps(self):
-        return [
-            app_file_info.name
-            for app_file_info in self.onos_container.list_files(f"{ROOT_FOLDER}/apps")
-        ]
+        if self._available_apps_cache is None:
+            self._available_apps_cache = [
+                app_file_info.name
+                for app_file_info in self.onos_container.list_files(
+                    f"{ROOT_FOLDER}/apps"
+                )
+            ]
+        return self._available_apps_cache
 
     def _add_user(self, username, password, group):
         if group not in self.groups:
@@ -421,16 +501,16 @@ class OnosCharm(CharmBase):
         if username in [ADMIN_USERNAME, GUEST_USERNAME]:
             raise Exception(f"username '{username}' is reserved")
         self.users.update({username: {"group": group, "password": password}})
-        self._configure_users_and_groups()
+        self._flush_users()
 
     def _add_group(self, groupname, roles):
         if groupname in [ADMIN_GROUP_NAME, GUEST_GROUP_NAME]:
             raise Exception(f"groupname '{groupname}' is reserved")
-        non_existing_roles = [role for role in roles if role not in ALL_ROLES]
+        non_existing_roles = [role for role in roles if role not in ALL_ROLES_SET]
         if non_existing_roles:
             raise Exception(f"role(s) {non_existing_roles} not exist")
         self.groups.update({groupname: roles})
-        self._configure_users_and_groups()
+        self._flush_users()
 
     def _delete_user(self, username):
         if username not in self.users:
@@ -438,64 +518,84 @@ class OnosCharm(CharmBase):
         if username in [ADMIN_USERNAME, GUEST_USERNAME]:
             raise Exception(f"user {username} is reserved")
         self.users.pop(username)
-        self._configure_users_and_groups()
+        self._flush_users()
 
     def _delete_group(self, groupname):
         if groupname in [ADMIN_GROUP_NAME, GUEST_GROUP_NAME]:
             raise Exception(f"groupname '{groupname}' is reserved")
         self.groups.pop(groupname)
-        self._configure_users_and_groups()
+        self._flush_users()
 
     def _activate_app(self, name):
-        self._check_app_exists(name)
-        if name in self._stored.apps:
-            raise Exception(f"application {name} is already active")
-        self._stored.apps.add(name)
+        self._activate_apps([name])
+
+    def _activate_apps(self, names):
+        for name in names:
+            self._check_app_exists(name)
+            if name in self._stored.apps:
+                raise Exception(f"application {name} is already active")
+        apps = set(self._stored.apps)
+        apps.update(names)
+        self._stored.apps = apps
+        self._apps_joined_len = -1
         if self.pebble_started:
-            requests.post(
-                f"http://localhost:8181/onos/v1/applications/{name}/active",
-                auth=(ADMIN_USERNAME, self.config["admin-password"]),
-            )
+            self._request_app_toggles(self.http_session.post, names)
 
     def _deactivate_app(self, name):
-        self._check_app_exists(name)
-        if name not in self._stored.apps:
-            raise Exception(f"application {name} is not active")
-        self._stored.apps.remove(name)
+        self._deactivate_apps([name])
+
+    def _deactivate_apps(self, names):
+        for name in names:
+            self._check_app_exists(name)
+            if name not in self._stored.apps:
+                raise Exception(f"application {name} is not active")
+        apps = set(self._stored.apps)
+        apps.difference_update(names)
+        self._stored.apps = apps
+        self._apps_joined_len = -1
         if self.pebble_started:
-            requests.delete(
-                f"http://localhost:8181/onos/v1/applications/{name}/active",
-                auth=(ADMIN_USERNAME, self.config["admin-password"]),
-            )
+            self._request_app_toggles(self.http_session.delete, names)
+
+    def _request_app_toggles(self, method, names):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {
+                executor.submit(
+                    method, f"http://localhost:8181/onos/v1/applications/{name}/active"
+                ): name
+                for name in names
+            }
+            failed = [
+                futures[future] for future in as_completed(futures) if future.exception()
+            ]
+        if failed:
+            raise Exception(f'request failed for application(s) {", ".join(failed)}')
 
     def _restart_onos(self):
-        container = self.unit.get_container("onos")
         if self.onos_service.current == ServiceStatus.ACTIVE:
-            container.stop("onos")
-        container.start("onos")
+            self.onos_container.stop("onos")
+        self.onos_container.start("onos")
 
     def _start_onos(self):
-        container = self.unit.get_container("onos")
         if self.onos_service.current == ServiceStatus.ACTIVE:
             raise Exception("onos service is already active")
-        container.start("onos")
+        self.onos_container.start("onos")
 
     def _stop_onos(self):
-        container = self.unit.get_container("onos")
         if self.onos_service.current != ServiceStatus.ACTIVE:
             raise Exception("onos service is not running")
-        container.stop("onos")
+        self.onos_container.stop("onos")
 
     ##############################
     # CHECK FUNCTIONS
     ##############################
     def _check_config(self):
-        if "admin-password" not in self.config:
+        config = self.config
+        if "admin-password" not in config:
             raise ConfigMissingException(
                 f"admin-password: juju config {self.app.name} admin-password=<pass>"
             )
-        if self.config.get("enable-guest"):
-            if "guest-password" not in self.config:
+        if config.get("enable-guest"):
+            if "guest-password" not in config:
                 raise ConfigMissingException(
                     f"guest-password: juju config {self.app.name} guest-password=<pass>"
                 )
@@ -510,14 +610,16 @@ class OnosCharm(CharmBase):
     ##############################
 
     def _get_apache_karaf_folder_path(self):
-        files = [
+        if self._karaf_folder:
+            return self._karaf_folder
+        self._karaf_folder = next(
             file.name
             for file in self.onos_container.list_files(
                 ROOT_FOLDER, pattern="apache-karaf-*"
             )
             if file.type == FileType.DIRECTORY
-        ]
-        return files[0]
+        )
+        return self._karaf_folder
 
     def _parse_roles(self, roles: str) -> list:
         """
@@ -529,11 +631,9 @@ class OnosCharm(CharmBase):
         """
         if not roles or not isinstance(roles, str):
             raise ValueError("roles must be a string")
-        role_list = roles.split(",")
-        for role in role_list:
-            if not role.isalnum():
-                raise ValueError(f"role '{role}' is not alphanumeric")
-        return role_list
+        if not ROLES_RE.fullmatch(roles):
+            raise ValueError(f"roles '{roles}' must be comma-listed alphanumerics")
+        return roles.split(",")
 
 
 if __name__ == "__main__":